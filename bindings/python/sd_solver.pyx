@@ -1,31 +1,36 @@
 # cython: language_level=3
 import numpy as np
 cimport numpy as np
+from libc.string cimport memcpy
 from sd_solver_c cimport sudoku_solver_c, sudoku_puzzle_t
 
-def solve(np.ndarray[np.int8_t, ndim=1, mode="c"] puzzle):
+def solve(const np.int8_t[::1] puzzle, np.int8_t[:, ::1] out=None):
     """
     Solve a 9x9 Sudoku puzzle.
 
     Parameters
     ----------
     puzzle : np.ndarray[int8]
-        1D array of length 81, where:
+        1D contiguous array of length 81 (read-only buffers are accepted), where:
           - 0 = empty cell
           - 1~9 = given digits
+    out : np.ndarray[int8], optional
+        Preallocated contiguous 9x9 array that receives the solution.
+        Reusing the same buffer avoids an allocation per call.
 
     Returns
     -------
     np.ndarray[int8]
-        Solved 9x9 Sudoku puzzle.
+        Solved 9x9 Sudoku puzzle (``out`` itself when given).
     """
-    if puzzle.size < 81:
+    if puzzle.shape[0] < 81:
         raise ValueError("puzzle must have at least 81 elements")
+    if out is not None and (out.shape[0] != 9 or out.shape[1] != 9):
+        raise ValueError("out must have shape (9, 9)")
 
     # --- copy puzzle data into the struct ---
     cdef sudoku_puzzle_t sp
-    for i in range(81):
-        sp.data[i] = <signed char> puzzle[i]
+    memcpy(sp.data, &puzzle[0], 81)
 
     # --- call the C API ---
     cdef const char *result = sudoku_solver_c(&sp)
@@ -35,9 +40,12 @@ def solve(np.ndarray[np.int8_t, ndim=1, mode="c"] puzzle):
     if msg != "Solved":
         raise RuntimeError(f"Sudoku solver failed: {msg}")
 
-    # --- convert back to numpy array ---
-    solved = np.empty(81, dtype=np.int8)
-    for i in range(81):
-        solved[i] = sp.data[i]
+    # --- copy the solution into the output array ---
+    if out is None:
+        solved = np.empty((9, 9), dtype=np.int8)
+        out = solved
+    else:
+        solved = out.base
+    memcpy(&out[0, 0], sp.data, 81)
 
-    return solved.reshape((9, 9))
+    return solved
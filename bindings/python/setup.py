@@ -1,8 +1,17 @@
 from setuptools import setup, Extension
+from setuptools.command.build_ext import build_ext
 from Cython.Build import cythonize
 import numpy
 import subprocess
+import sysconfig
 import tempfile
+import glob
+import hashlib
+import platform
+import shutil
+import shlex
+import json
+import time
 import os
 import sys
 
@@ -14,15 +23,100 @@ c_api_path = os.path.abspath(os.path.join(base_dir, "..", ".."))
 
 is_msvc = sys.platform == "win32"
 
+
+def _log(msg):
+    """Print a plain-ASCII status line unless SD_QUIET is set."""
+    if not os.environ.get("SD_QUIET"):
+        print(f"[sd_solver] {msg}")
+
+
+build_dir = os.path.join(base_dir, "build")
+
+# SD_NATIVE=1 tunes the build for the host CPU; leave unset for portable wheels
+use_native = os.environ.get("SD_NATIVE") == "1"
+
+# SD_PGO=generate builds an instrumented module; SD_PGO=use rebuilds with the profile
+pgo_mode = os.environ.get("SD_PGO", "")
+pgo_dir = os.path.join(build_dir, "pgo-data")
+if pgo_mode not in ("", "generate", "use"):
+    sys.exit(f"SD_PGO must be 'generate' or 'use', got {pgo_mode!r}")
+
 extra_compile_args = []
 extra_link_args = []
 include_dirs = [base_dir, c_api_path, numpy.get_include()]
 
 # -----------------------------------------------------------------------------
-# Step 1: Try to discover jh::jh-toolkit* via CMake introspection
+# Step 1: Try to discover jh::jh-toolkit* (header lookup, pkg-config, then CMake)
 # -----------------------------------------------------------------------------
+def _fast_find_jh():
+    """Find the header-only jh-toolkit without CMake: known prefixes, then pkg-config."""
+    prefixes = ["/usr/local/include", "/usr/include"]
+    if os.environ.get("CONDA_PREFIX"):
+        prefixes.insert(0, os.path.join(os.environ["CONDA_PREFIX"], "include"))
+    for prefix in prefixes:
+        for inc in (os.path.join(prefix, "jh-toolkit"), prefix):
+            if os.path.exists(os.path.join(inc, "jh", "pod")):
+                # /usr/include is searched already; passing it via -I breaks #include_next
+                include_dirs = [] if inc == "/usr/include" else [inc]
+                return {"target": "jh-toolkit headers", "include_dirs": include_dirs, "link_libs": []}
+
+    if shutil.which("pkg-config") is None:
+        return None
+    try:
+        result = subprocess.run(
+            ["pkg-config", "--cflags", "--libs", "jh-toolkit"],
+            capture_output=True, text=True, check=True,
+        )
+    except subprocess.CalledProcessError:
+        return None
+    includes, libs = [], []
+    for token in shlex.split(result.stdout):
+        if token.startswith("-I"):
+            includes.append(token[2:])
+        elif token.startswith(("-L", "-l")):
+            # -L is kept so libraries in a non-default prefix still link
+            libs.append(token)
+    # A .pc file alone is not enough: the headers must actually be reachable
+    if not any(os.path.exists(os.path.join(inc, "jh", "pod")) for inc in includes + prefixes):
+        return None
+    return {"target": "jh-toolkit (pkg-config)", "include_dirs": includes, "link_libs": libs}
+
+
+def _probe_cache_path():
+    """Cache file for the CMake probe, keyed on the inputs that affect its result."""
+    key = repr((sys.platform, shutil.which("cmake"), os.environ.get("CMAKE_PREFIX_PATH", "")))
+    digest = hashlib.blake2b(key.encode("utf-8"), digest_size=8).hexdigest()
+    return os.path.join(build_dir, f".jh_probe.{digest}.json")
+
+
 def cmake_find_jh_toolkit():
+    """Find jh::jh-toolkit, reusing a cached probe result for up to 24h.
+
+    Set SD_FORCE_PROBE=1 to ignore the cache and rerun CMake.
+    """
+    cache = _probe_cache_path()
+    if os.environ.get("SD_FORCE_PROBE") != "1":
+        try:
+            if time.time() - os.path.getmtime(cache) < 24 * 3600:
+                with open(cache) as f:
+                    return json.load(f)
+        except (OSError, ValueError):
+            pass
+
+    jh = _cmake_probe_jh_toolkit()
+    try:
+        os.makedirs(build_dir, exist_ok=True)
+        with open(cache, "w") as f:
+            json.dump(jh, f)
+    except OSError:
+        pass
+    return jh
+
+
+def _cmake_probe_jh_toolkit():
     """Try to find jh::jh-toolkit target via temporary CMake project."""
+    if shutil.which("cmake") is None:
+        return None
     with tempfile.TemporaryDirectory() as tmp:
         cmakelists = os.path.join(tmp, "CMakeLists.txt")
         with open(cmakelists, "w") as f:
@@ -82,21 +176,44 @@ message(STATUS "JH_LINK_LIBS=${LIBS}")
         return None
 
 
+def compiler_accepts(flags, source="int main() { return 0; }\n"):
+    """Check whether the C++ compiler builds `source` (a trivial TU by default) with the given flags."""
+    cxx = shlex.split(os.environ.get("CXX", "c++"))
+    with tempfile.TemporaryDirectory() as tmp:
+        src = os.path.join(tmp, "probe.cpp")
+        with open(src, "w") as f:
+            f.write(source)
+        try:
+            subprocess.run(
+                cxx + flags + [src, "-o", os.path.join(tmp, "probe")],
+                capture_output=True, check=True,
+            )
+        except (OSError, subprocess.CalledProcessError):
+            return False
+    return True
+
+
 # -----------------------------------------------------------------------------
 # Step 2: Platform-specific logic
 # -----------------------------------------------------------------------------
 if is_msvc:
     # Force UTF-8 encoding for stdout/stderr to avoid UnicodeEncodeError on Windows
-    sys.stdout.reconfigure(encoding="utf-8")
-    sys.stderr.reconfigure(encoding="utf-8")
+    try:
+        sys.stdout.reconfigure(encoding="utf-8")
+        sys.stderr.reconfigure(encoding="utf-8")
+    except AttributeError:
+        pass  # replaced/non-tty streams without reconfigure()
     # Windows uses MSVC — skip jh-toolkit detection
-    print("\u2139\ufe0f  MSVC detected \u2014 skipping jh-toolkit detection (use internal POD)")
+    _log("MSVC detected - skipping jh-toolkit detection (use internal POD)")
     extra_compile_args = ["/std:c++20", "/DNPY_NO_DEPRECATED_API=NPY_1_7_API_VERSION"]
+    extra_compile_args += ["/O2", "/Ob3", "/DNDEBUG", "/DCYTHON_WITHOUT_ASSERTIONS"]
+    if use_native:
+        extra_compile_args.append("/arch:AVX2")
 else:
     # Try to detect jh-toolkit on UNIX-like systems
-    jh = cmake_find_jh_toolkit()
+    jh = _fast_find_jh() or cmake_find_jh_toolkit()
     if jh:
-        print(f"\u2705 Found {jh['target']}")
+        _log(f"found {jh['target']}")
         for inc in jh["include_dirs"]:
             if inc and os.path.exists(inc):
                 include_dirs.append(inc)
@@ -105,23 +222,181 @@ else:
                 extra_link_args.append(lib)
         extra_compile_args += ["-std=c++20", "-DSD_USE_JH_POD=1"]
     else:
-        print("\u26a0\ufe0f  jh-toolkit not found \u2014 using internal POD fallback")
+        _log("jh-toolkit not found - using internal POD fallback")
         extra_compile_args += ["-std=c++17"]
     extra_compile_args.append("-DNPY_NO_DEPRECATED_API=NPY_1_7_API_VERSION")
+    extra_compile_args += ["-O3", "-funroll-loops", "-fno-plt", "-DNDEBUG", "-DCYTHON_WITHOUT_ASSERTIONS"]
+    # Export only PyInit_sd_solver (PyMODINIT_FUNC marks it visible) and let
+    # the linker drop unused solver helpers and debug info
+    extra_compile_args += [
+        "-fvisibility=hidden", "-fvisibility-inlines-hidden",
+        "-ffunction-sections", "-fdata-sections",
+    ]
+    if sys.platform == "darwin":
+        strip_flags = ["-Wl,-dead_strip", "-Wl,-x"]
+    else:
+        strip_flags = ["-Wl,-s", "-Wl,--gc-sections", "-Wl,--as-needed"]
+    if compiler_accepts(strip_flags):
+        extra_link_args += strip_flags
+    if use_native:
+        native_flags = ["-march=native", "-mtune=native"]
+        if compiler_accepts(native_flags):
+            extra_compile_args += native_flags
+        else:
+            _log("compiler rejected -march=native - building for the generic target")
+    # PGO instruments the ifunc resolver, which runs during relocation and
+    # crashes the instrumented module on import: no clones for PGO builds
+    if not use_native and not pgo_mode and platform.machine().lower() in ("x86_64", "amd64", "i386", "i686"):
+        # Portable build: clone the solver kernel per ISA, picked at load time
+        clones_probe = (
+            '__attribute__((target_clones("arch=skylake-avx512", "arch=haswell", "default")))\n'
+            "static int probe(int x) { return __builtin_popcount(x); }\n"
+            "int main() { return probe(0); }\n"
+        )
+        if compiler_accepts([], clones_probe):
+            extra_compile_args.append("-DSD_MULTIVERSION=1")
+
+# Link-time optimization: lets the solver and the Cython wrapper be optimized
+# as one unit at link time instead of in isolation
+if is_msvc:
+    extra_compile_args.append("/GL")
+    extra_link_args.append("/LTCG:incremental")
+else:
+    lto_flags = ["-flto=auto", "-ffat-lto-objects"]
+    if compiler_accepts(lto_flags):
+        extra_compile_args += lto_flags
+        extra_link_args += lto_flags
+    else:
+        _log("compiler rejected -flto - building without LTO")
+
+# Profile-guided optimization (two-stage build, see README). The flags are
+# applied in sd_build_ext.build_extension rather than on the Extension:
+# Cython records the Extension's args in a header of the generated .cpp, and
+# any difference between the stages shifts every line and voids the profile.
+pgo_compile_args, pgo_link_args = [], []
+if pgo_mode and is_msvc:
+    # PGO needs full /LTCG; the profile is read from the .pgd next to the module
+    pgo_link_args = ["/LTCG", "/GENPROFILE" if pgo_mode == "generate" else "/USEPROFILE"]
+elif pgo_mode == "generate":
+    pgo_compile_args = pgo_link_args = [f"-fprofile-generate={pgo_dir}"]
+elif pgo_mode == "use":
+    pgo_compile_args = pgo_link_args = [f"-fprofile-use={pgo_dir}", "-fprofile-correction"]
+
+# Route compiles through ccache when available so unchanged TUs are not rebuilt
+if not is_msvc and shutil.which("ccache"):
+    for var, default in (("CC", "cc"), ("CXX", "c++")):
+        cmd = os.environ.get(var) or sysconfig.get_config_var(var) or default
+        if not cmd.startswith("ccache "):
+            os.environ[var] = f"ccache {cmd}"
 
 # -----------------------------------------------------------------------------
 # Step 3: Define Cython extension
 # -----------------------------------------------------------------------------
-ext_modules = [
-    Extension(
-        "sd_solver",
-        sources=["sd_solver.pyx"],
-        language="c++",
-        include_dirs=include_dirs,
-        extra_compile_args=extra_compile_args,
-        extra_link_args=extra_link_args,
-    )
-]
+cython_dir = os.path.join(build_dir, "cython")
+generated_cpp = os.path.join(cython_dir, "sd_solver.cpp")
+
+# Everything the extension depends on; setup.py itself carries the flags
+build_inputs = (
+    [os.path.join(base_dir, "sd_solver.pyx"), os.path.abspath(__file__)]
+    + glob.glob(os.path.join(base_dir, "*.pxd"))
+    + glob.glob(os.path.join(c_api_path, "*.h"))
+    + glob.glob(os.path.join(c_api_path, "*.hpp"))
+)
+
+
+def _skip_if_up_to_date(anchor, sources, force):
+    """Return True if `anchor` exists and is newer than every file in `sources`."""
+    if force or not anchor or not os.path.exists(anchor):
+        return False
+    anchor_mtime = os.path.getmtime(anchor)
+    return all(os.path.getmtime(src) < anchor_mtime for src in sources)
+
+
+# SD_FORCE_BUILD=1 disables both shortcuts below; PGO stages always rebuild
+force_build = os.environ.get("SD_FORCE_BUILD") == "1" or bool(pgo_mode)
+inplace = "--inplace" in sys.argv or "-i" in sys.argv
+# Only a module built for this interpreter's ABI counts as up to date
+inplace_so = os.path.join(base_dir, "sd_solver" + sysconfig.get_config_var("EXT_SUFFIX"))
+
+
+def _flags_stamp():
+    """Record the computed build configuration in build/.flags.
+
+    The file is rewritten (bumping its mtime) only when the configuration
+    changes, so environment-driven flags such as SD_NATIVE or a new
+    jh-toolkit location invalidate the built module. It is passed to the
+    Extension as a dependency, so setuptools' own up-to-date check sees it too.
+    """
+    config = repr((
+        extra_compile_args, extra_link_args, include_dirs,
+        pgo_compile_args, pgo_link_args,
+        os.environ.get("CC"), os.environ.get("CXX"),
+    ))
+    stamp = os.path.join(build_dir, ".flags")
+    try:
+        with open(stamp) as f:
+            if f.read() == config:
+                return stamp
+    except OSError:
+        pass
+    os.makedirs(build_dir, exist_ok=True)
+    with open(stamp, "w") as f:
+        f.write(config)
+    return stamp
+
+
+build_depends = build_inputs + [_flags_stamp()]
+
+if inplace and _skip_if_up_to_date(inplace_so, build_depends, force_build):
+    # In-place module is already current: nothing to regenerate or recompile
+    _log(f"{os.path.basename(inplace_so)} is up to date")
+    ext_modules = []
+    needs_cython = False
+else:
+    # Reuse the generated C++ when the .pyx and its inputs have not changed
+    needs_cython = not _skip_if_up_to_date(generated_cpp, build_inputs, force_build)
+    ext_modules = [
+        Extension(
+            "sd_solver",
+            sources=["sd_solver.pyx" if needs_cython else os.path.relpath(generated_cpp, base_dir)],
+            language="c++",
+            include_dirs=include_dirs,
+            extra_compile_args=extra_compile_args,
+            extra_link_args=extra_link_args,
+            depends=build_depends,
+        )
+    ]
+
+
+class sd_build_ext(build_ext):
+    """build_ext with a persistent, platform-tagged build_temp under build/.
+
+    Keeping object files in the source tree lets them (and ccache) survive
+    pip's throwaway build environments. Sources compile in parallel unless
+    -j/--parallel is given explicitly.
+    """
+
+    def finalize_options(self):
+        if force_build:
+            # Also bypass build_ext's own .so-vs-source check (PGO stages, SD_FORCE_BUILD)
+            self.force = True
+        if self.parallel is None:
+            self.parallel = os.cpu_count() or 1
+        if self.build_temp is None:
+            self.build_temp = os.path.join(
+                build_dir,
+                f"temp.{sysconfig.get_platform()}-{sys.version_info.major}{sys.version_info.minor}",
+            )
+        super().finalize_options()
+
+    def build_extension(self, ext):
+        if pgo_mode:
+            ext.extra_compile_args = ext.extra_compile_args + pgo_compile_args
+            ext.extra_link_args = [
+                arg for arg in ext.extra_link_args if arg != "/LTCG:incremental"
+            ] + pgo_link_args
+        super().build_extension(ext)
+
 
 # -----------------------------------------------------------------------------
 # Step 4: Build
@@ -129,6 +404,18 @@ ext_modules = [
 setup(
     name="sd_solver",
     version="1.1.0",
-    ext_modules=cythonize(ext_modules, language_level="3"),
+    ext_modules=cythonize(
+        ext_modules,
+        language_level="3",
+        compiler_directives={
+            "boundscheck": False,
+            "wraparound": False,
+            "initializedcheck": False,
+            "cdivision": True,
+        },
+        build_dir=cython_dir,
+        nthreads=max(1, (os.cpu_count() or 1) // 2),
+    ) if needs_cython else ext_modules,
+    cmdclass={"build_ext": sd_build_ext},
     zip_safe=False,
 )
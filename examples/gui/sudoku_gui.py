@@ -1,79 +1,112 @@
 try:
-    from sd_solver import solve
-except ImportError as e:
-    print("❌ You need to build or install the `sd_solver` Cython extension first.")
-    print("   Run: `python setup.py build_ext --inplace` or `pip install .`")
-    raise e
-
-try:
-    from PySide6.QtWidgets import QApplication
+    from PySide6.QtWidgets import (
+        QApplication, QWidget, QGridLayout, QPushButton,
+        QVBoxLayout, QHBoxLayout, QLabel, QMessageBox,
+        QSizePolicy, QScrollArea, QStyle, QStyleOption
+    )
+    from PySide6.QtCore import Qt
+    from PySide6.QtGui import QFont, QPainter, QPalette, QStaticText, QTransform
 except ImportError as e:
     print("❌ Missing PySide6. Install it via:")
     print("   pip install PySide6")
     raise e
 
+import importlib
 import sys
-import numpy as np
-from PySide6.QtWidgets import (
-    QApplication, QWidget, QGridLayout, QPushButton,
-    QVBoxLayout, QHBoxLayout, QLabel, QMessageBox
-)
-from PySide6.QtCore import Qt
-from PySide6.QtGui import QFont
-from PySide6.QtWidgets import QSizePolicy
-from PySide6.QtWidgets import QScrollArea
-
-import sd_solver
-
-class SudokuCell(QLabel):
+
+
+def _lazy_import(name, hint):
+    """Import `name` on first use; re-raise ImportError with an install hint."""
+    try:
+        return importlib.import_module(name)
+    except ImportError as e:
+        raise ImportError(f"{hint}\n({e})") from e
+
+
+# Cell text for each value; 0 shows as an empty cell
+_DIGIT_STR = ("", "1", "2", "3", "4", "5", "6", "7", "8", "9")
+
+
+class SudokuCell(QWidget):
+    # Shared font and pre-shaped digit glyphs, built on first construction
+    # (fonts need a running QApplication)
+    _font = None
+    _static = None
+
+    # Arrow key -> (row delta, column delta)
+    _ARROWS = {
+        Qt.Key_Up: (-1, 0),
+        Qt.Key_Down: (1, 0),
+        Qt.Key_Left: (0, -1),
+        Qt.Key_Right: (0, 1),
+    }
+
     def __init__(self, row, col, value=0, parent=None):
         super().__init__(parent)
+        if SudokuCell._static is None:
+            SudokuCell._font = QFont("Arial", 20)
+            SudokuCell._static = [QStaticText(s) for s in _DIGIT_STR]
+            for text in SudokuCell._static:
+                text.prepare(QTransform(), SudokuCell._font)
         self.row = row
         self.col = col
+        self.app = None
         self.setFixedSize(50, 50)
-        self.setAlignment(Qt.AlignCenter)
-        self.setFont(QFont("Arial", 20))
-        self.setStyleSheet("border: 1px solid black;")
+        self.setProperty("focused", False)
         self.value = value
-        self.setText("" if value == 0 else str(value))
         self.setFocusPolicy(Qt.StrongFocus)
 
     def setValue(self, val):
+        if val == self.value:
+            return
         self.value = val
-        self.setText("" if val == 0 else str(val))
+        self.update()
+
+    def paintEvent(self, event):
+        painter = QPainter(self)
+        # Plain QWidget subclasses must draw their stylesheet border themselves
+        opt = QStyleOption()
+        opt.initFrom(self)
+        self.style().drawPrimitive(QStyle.PE_Widget, opt, painter, self)
+
+        text = self._static[self.value]
+        size = text.size()
+        painter.setFont(self._font)
+        painter.setPen(self.palette().color(QPalette.WindowText))
+        painter.drawStaticText(
+            int((self.width() - size.width()) / 2),
+            int((self.height() - size.height()) / 2),
+            text,
+        )
 
     def keyPressEvent(self, event):
         key = event.key()
-        if Qt.Key_0 <= key <= Qt.Key_9:
-            num = key - Qt.Key_0
+        num = key - Qt.Key_0
+        if 0 <= num <= 9:
             self.setValue(num)
-        elif key in (Qt.Key_Up, Qt.Key_Down, Qt.Key_Left, Qt.Key_Right):
-            self.move_focus(key)
-
-    def move_focus(self, key):
-        parent = self.parent()
-        if not hasattr(parent, "board"):
             return
-
-        r, c = self.row, self.col
-        if key == Qt.Key_Up:
-            r = (r - 1) % 9
-        elif key == Qt.Key_Down:
-            r = (r + 1) % 9
-        elif key == Qt.Key_Left:
-            c = (c - 1) % 9
-        elif key == Qt.Key_Right:
-            c = (c + 1) % 9
-
-        next_cell = parent.board[r][c]
-        next_cell.setFocus()
+        delta = self._ARROWS.get(key)
+        if delta is not None:
+            self.move_focus(*delta)
+
+    def move_focus(self, dr, dc):
+        r = (self.row + dr) % 9
+        c = (self.col + dc) % 9
+        self.app._flat[r * 9 + c].setFocus()
+
+    def set_focused(self, focused):
+        # Border comes from the grid's stylesheet; re-polish to re-match [focused]
+        self.setProperty("focused", focused)
+        self.style().unpolish(self)
+        self.style().polish(self)
+        self.update()
 
     def focusInEvent(self, event):
-        self.setStyleSheet("border: 2px solid #3776AB;")
+        self.set_focused(True)
         super().focusInEvent(event)
 
     def focusOutEvent(self, event):
-        self.setStyleSheet("border: 1px solid black;")
+        self.set_focused(False)
         super().focusOutEvent(event)
         
 class SudokuApp(QWidget):
@@ -81,6 +114,12 @@ class SudokuApp(QWidget):
         super().__init__()
         self.setWindowTitle("Sudoku · PySide6")
         self.board = [[SudokuCell(r, c) for c in range(9)] for r in range(9)]
+        self._flat = [cell for row in self.board for cell in row]
+        for cell in self._flat:
+            cell.app = self
+        # numpy and sd_solver are loaded on the first solve, not at startup
+        self._sd_solver = None
+        self._in = self._out = None
         self.init_ui()
         screen_rect = QApplication.primaryScreen().availableGeometry()
         self.setMinimumSize(400, 400)
@@ -91,6 +130,10 @@ class SudokuApp(QWidget):
 
         # ---- Sudoku Grid ----
         grid_widget = QWidget()
+        grid_widget.setStyleSheet(
+            "SudokuCell { border: 1px solid black; }"
+            "SudokuCell[focused=true] { border: 2px solid #3776AB; }"
+        )
         grid_layout = QGridLayout(grid_widget)
         for r in range(9):
             for c in range(9):
@@ -145,26 +188,44 @@ class SudokuApp(QWidget):
             widget.setValue(num)
 
     def clear_board(self):
-        for row in self.board:
-            for cell in row:
+        # Suspend repaints so all 81 cells are redrawn once
+        self.setUpdatesEnabled(False)
+        try:
+            for cell in self._flat:
                 cell.setValue(0)
+        finally:
+            self.setUpdatesEnabled(True)
+
+    def _load_solver(self):
+        if self._sd_solver is None:
+            np = _lazy_import("numpy", "Missing NumPy. Install it via: pip install numpy")
+            self._sd_solver = _lazy_import(
+                "sd_solver",
+                "You need to build or install the `sd_solver` Cython extension first.\n"
+                "Run: `python setup.py build_ext --inplace` or `pip install .`",
+            )
+            # Reused for every solve so no arrays are allocated per click
+            self._in = np.zeros(81, dtype=np.int8)
+            self._out = np.zeros((9, 9), dtype=np.int8)
+        return self._sd_solver
 
     def get_puzzle_array(self):
-        arr = np.zeros(81, dtype=np.int8)
-        for r in range(9):
-            for c in range(9):
-                arr[r * 9 + c] = self.board[r][c].value
-        return arr
+        self._in[:] = [cell.value for cell in self._flat]
+        return self._in
 
     def update_board(self, array_2d):
-        for r in range(9):
-            for c in range(9):
-                self.board[r][c].setValue(array_2d[r, c])
+        self.setUpdatesEnabled(False)
+        try:
+            for cell, val in zip(self._flat, array_2d.ravel().tolist()):
+                cell.setValue(val)
+        finally:
+            self.setUpdatesEnabled(True)
 
     def solve_puzzle(self):
         try:
+            sd_solver = self._load_solver()
             puzzle = self.get_puzzle_array()
-            solved = sd_solver.solve(puzzle)
+            solved = sd_solver.solve(puzzle, self._out)
             self.update_board(solved)
         except Exception as e:
             QMessageBox.critical(self, "Error", str(e))
@@ -186,6 +186,27 @@ namespace sd {
 }
 #endif
 
+/**
+ * <h3>Runtime ISA Dispatch</h3>
+ * <p>
+ * When <code>SD_MULTIVERSION</code> is defined to <code>1</code> on GCC/Clang
+ * x86 ELF targets, the backtracking kernel <code>sd::solve</code> is compiled
+ * once per ISA level (AVX-512, AVX2/BMI2, baseline) and the best clone for
+ * the running CPU is selected once at load time.
+ * This keeps portable binaries fast without requiring <code>-march=native</code>.
+ * </p>
+ */
+#ifndef SD_MULTIVERSION
+#  define SD_MULTIVERSION 0
+#endif
+
+#if SD_MULTIVERSION && (defined(__GNUC__) || defined(__clang__)) && defined(__ELF__) \
+    && (defined(__x86_64__) || defined(__i386__))
+#  define SD_TARGET_CLONES __attribute__((target_clones("arch=skylake-avx512", "arch=haswell", "default")))
+#else
+#  define SD_TARGET_CLONES
+#endif
+
 namespace sd {
     namespace detail {
         // =========================
@@ -443,6 +464,7 @@ namespace sd {
      * @param root Board to solve (in-place).
      * @return true if solved, false otherwise.
      */
+    SD_TARGET_CLONES
     static bool solve(Board &root) {
         const auto raw_stack = std::make_unique<uint8_t[]>(81 * sizeof(Frame)); // Maximum 81 frames
         auto stack = reinterpret_cast<Frame *>(raw_stack.get()); // Avoid initializing unused stack frames